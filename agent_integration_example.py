@@ -10,28 +10,77 @@ Shows how databases work with agent flow:
 
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+import argparse
+import asyncio
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
 import numpy as np
 from object_db import ObjectRecord, SceneRecord, ObjectVectorDB
 from people_db import PersonRecord, PeopleVectorDB
+from db_common import Embedding, QueryConfig, optional_module
+from example_utils import random_vectors, seed_rng
+from kernels import cosine_kernel
+from printer import Printer
+
+# HNSW candidates fetched per query before exact cosine re-ranking
+RERANK_CANDIDATES = 50
+
+
+def _rerank_by_cosine(
+    query_embedding: Embedding,
+    hits: List[Dict[str, Any]],
+    n_results: int,
+) -> List[Dict[str, Any]]:
+    """Order candidate hits by exact cosine distance and keep the best n_results"""
+    if not hits:
+        return hits
+    query = np.asarray(query_embedding, dtype=np.float32)
+    candidates = np.ascontiguousarray(
+        np.stack([hit.pop("embedding") for hit in hits]), dtype=np.float32
+    )
+    kernel = cosine_kernel(query.shape[0])
+    # optional: without numba or simsimd, re-ranking is a single BLAS matvec
+    simsimd = optional_module("simsimd")
+    if kernel is not None:
+        distances = np.empty(len(candidates), dtype=np.float64)
+        kernel(np.ascontiguousarray(query), candidates, distances)
+    elif simsimd is not None:
+        distances = np.asarray(simsimd.cdist(query[np.newaxis], candidates, metric="cosine"))[0]
+    else:
+        norms = np.linalg.norm(candidates, axis=1) * np.linalg.norm(query)
+        distances = 1.0 - (candidates @ query) / np.maximum(norms, 1e-12)
+
+    order = np.argsort(distances, kind="stable")[:n_results]
+    reranked = []
+    for i in order:
+        hit = hits[i]
+        hit["distance"] = float(distances[i])
+        reranked.append(hit)
+    return reranked
 
 
 class AgentIntegration:
     """Example integration class for agent system"""
     
     def __init__(self, object_db_path: str = "chroma_db", people_db_path: str = "chroma_people_db"):
-        self.object_db = ObjectVectorDB(persist_directory=object_db_path)
-        self.people_db = PeopleVectorDB(persist_directory=people_db_path)
+        self.object_db = ObjectVectorDB.get(object_db_path)
+        self.people_db = PeopleVectorDB.get(people_db_path)
+        
+        # coordinate lookups are cached per DB generation, so any write invalidates them
+        self._object_coordinates = lru_cache(maxsize=256)(self._lookup_object_coordinates)
+        self._scene_coordinates = lru_cache(maxsize=256)(self._lookup_scene_coordinates)
+        self._person_coordinates = lru_cache(maxsize=256)(self._lookup_person_coordinates)
     
     def process_object_detection(
         self,
         object_id: str,
         object_xyz: tuple[float, float, float],
         object_image_path: str,
-        object_embedding: List[float],
-        location_embedding: List[float],
+        object_embedding: Embedding,
+        location_embedding: Embedding,
+        printer: Callable[..., None] = print,
     ) -> None:
-        """Store detected objects"""
+        """Store detected objects; the confirmation goes to printer"""
         obj = ObjectRecord(
             object_id=object_id,
             object_xyz=object_xyz,
@@ -40,16 +89,17 @@ class AgentIntegration:
             location_embedding=location_embedding,
         )
         self.object_db.upsert(obj)
-        print(f"Stored object: {object_id} at {object_xyz}")
+        printer(f"Stored object: {object_id} at {object_xyz}")
     
     def process_scene_detection(
         self,
         scene_id: str,
         slam_xyz: tuple[float, float, float],
         scene_image_path: str,
-        scene_embedding: List[float],
+        scene_embedding: Embedding,
+        printer: Callable[..., None] = print,
     ) -> None:
-        """Store detected scenes"""
+        """Store detected scenes; the confirmation goes to printer"""
         scene = SceneRecord(
             scene_id=scene_id,
             scene_xyz=slam_xyz,
@@ -57,18 +107,19 @@ class AgentIntegration:
             scene_embedding=scene_embedding,
         )
         self.object_db.upsert_scene(scene)
-        print(f"Stored scene: {scene_id} at SLAM {slam_xyz}")
+        printer(f"Stored scene: {scene_id} at SLAM {slam_xyz}")
     
     def process_people_detection(
         self,
         person_id: str,
         people_xyz: tuple[float, float, float],
-        face_embedding: Optional[List[float]] = None,
-        pose_embedding: Optional[List[float]] = None,
+        face_embedding: Optional[Embedding] = None,
+        pose_embedding: Optional[Embedding] = None,
         timeframe: Optional[str] = None,
         chat_history_ref: Optional[str] = None,
+        printer: Callable[..., None] = print,
     ) -> None:
-        """Store detected people"""
+        """Store detected people; the confirmation goes to printer"""
         person = PersonRecord(
             person_id=person_id,
             people_xyz=people_xyz,
@@ -78,23 +129,29 @@ class AgentIntegration:
             chat_history_ref=chat_history_ref,
         )
         self.people_db.upsert(person)
-        print(f"Stored person: {person_id} at {people_xyz}")
+        printer(f"Stored person: {person_id} at {people_xyz}")
     
     def find_objects(
         self,
-        query_embedding: List[float],
+        query_embedding: Embedding,
         search_type: str = "image",
         n_results: int = 5,
     ) -> List[Dict[str, Any]]:
         """Find objects by image or location similarity"""
+        n_candidates = max(n_results, RERANK_CANDIDATES)
         if search_type == "image":
-            return self.object_db.query_by_image_embedding(query_embedding, n_results=n_results)
+            hits = self.object_db.query_by_image_embedding(
+                query_embedding, n_results=n_candidates, include_embeddings=True
+            )
         else:
-            return self.object_db.query_by_location_embedding(query_embedding, n_results=n_results)
+            hits = self.object_db.query_by_location_embedding(
+                query_embedding, n_results=n_candidates, include_embeddings=True
+            )
+        return _rerank_by_cosine(query_embedding, hits, n_results)
     
     def find_scenes(
         self,
-        query_embedding: Optional[List[float]] = None,
+        query_embedding: Optional[Embedding] = None,
         slam_coords: Optional[tuple[float, float, float]] = None,
         radius: float = 1.0,
         n_results: int = 5,
@@ -113,13 +170,21 @@ class AgentIntegration:
     
     def find_people(
         self,
-        face_embedding: Optional[List[float]] = None,
-        pose_embedding: Optional[List[float]] = None,
+        face_embedding: Optional[Embedding] = None,
+        pose_embedding: Optional[Embedding] = None,
         n_results: int = 5,
+        query_config: Optional[QueryConfig] = None,
     ) -> List[Dict[str, Any]]:
         """Find people by face or pose embedding"""
+        if query_config is not None:
+            self.people_db.configure_search(query_config)
+        n_candidates = max(n_results, RERANK_CANDIDATES)
         if face_embedding is not None:
-            return self.people_db.query_by_face_embedding(face_embedding, n_results=n_results)
+            # candidates are re-ranked in float32 below, so skip the int8 pass
+            hits = self.people_db.query_by_face_embedding(
+                face_embedding, n_results=n_candidates, include_embeddings=True, quantized=False
+            )
+            return _rerank_by_cosine(face_embedding, hits, n_results)
         elif pose_embedding is not None:
             return self.people_db.query_by_pose_embedding(pose_embedding, n_results=n_results)
         else:
@@ -129,117 +194,164 @@ class AgentIntegration:
         """Get person by FaceID"""
         return self.people_db.get_person_by_face_id(face_id)
     
+    async def afind_objects(self, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        """find_objects on a worker thread, so independent queries can overlap"""
+        return await asyncio.to_thread(self.find_objects, *args, **kwargs)
+    
+    async def afind_scenes(self, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        """find_scenes on a worker thread, so independent queries can overlap"""
+        return await asyncio.to_thread(self.find_scenes, *args, **kwargs)
+    
+    async def afind_people(self, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        """find_people on a worker thread, so independent queries can overlap"""
+        return await asyncio.to_thread(self.find_people, *args, **kwargs)
+    
+    async def aget_person_by_face_id(self, face_id: str) -> Optional[Dict[str, Any]]:
+        """get_person_by_face_id on a worker thread"""
+        return await asyncio.to_thread(self.get_person_by_face_id, face_id)
+    
     def get_object_coordinates(self, object_id: str) -> Optional[tuple[float, float, float]]:
         """Get object coordinates for robot navigation"""
-        obj = self.object_db.get_object(object_id)
-        if obj:
-            xyz = obj['object_xyz']
-            return (xyz[0], xyz[1], xyz[2])
-        return None
+        return self._object_coordinates(object_id, self.object_db.generation)
     
     def get_scene_coordinates(self, scene_id: str) -> Optional[tuple[float, float, float]]:
         """Get scene SLAM coordinates for robot navigation"""
-        scene = self.object_db.get_scene(scene_id)
-        if scene:
-            xyz = scene['scene_xyz']
-            return (xyz[0], xyz[1], xyz[2])
-        return None
+        return self._scene_coordinates(scene_id, self.object_db.generation)
     
     def get_person_coordinates(self, person_id: str) -> Optional[tuple[float, float, float]]:
         """Get person coordinates for robot navigation"""
+        return self._person_coordinates(person_id, self.people_db.generation)
+    
+    def _lookup_object_coordinates(
+        self, object_id: str, generation: int
+    ) -> Optional[tuple[float, float, float]]:
+        obj = self.object_db.get_object(object_id)
+        return tuple(obj['object_xyz']) if obj else None
+    
+    def _lookup_scene_coordinates(
+        self, scene_id: str, generation: int
+    ) -> Optional[tuple[float, float, float]]:
+        scene = self.object_db.get_scene(scene_id)
+        return tuple(scene['scene_xyz']) if scene else None
+    
+    def _lookup_person_coordinates(
+        self, person_id: str, generation: int
+    ) -> Optional[tuple[float, float, float]]:
         person = self.people_db.get_person(person_id)
-        if person:
-            xyz = person['people_xyz']
-            return (xyz[0], xyz[1], xyz[2])
-        return None
+        return tuple(person['people_xyz']) if person else None
 
 
-def example_agent_flow():
+async def example_agent_flow(seed: Optional[int] = None):
     """Simulates database usage in agent flow"""
-    print("=" * 60)
-    print("Agent & Robot Integration Example")
-    print("=" * 60)
-    print()
-    
-    agent = AgentIntegration()
-    
-    print("1. Vision detects objects")
-    agent.process_object_detection(
-        object_id="mug_01",
-        object_xyz=(1.0, 2.0, 0.0),
-        object_image_path="images/mug_01.png",
-        object_embedding=np.random.randn(128).tolist(),
-        location_embedding=np.random.randn(64).tolist(),
-    )
-    
-    print("\n2. Vision detects scenes")
-    agent.process_scene_detection(
-        scene_id="kitchen_01",
-        slam_xyz=(2.5, 3.1, 0.0),
-        scene_image_path="images/kitchen_01.png",
-        scene_embedding=np.random.randn(256).tolist(),
-    )
-    
-    print("\n3. Vision detects people")
-    agent.process_people_detection(
-        person_id="person_01",
-        people_xyz=(4.0, 5.0, 0.0),
-        face_embedding=np.random.randn(512).tolist(),
-        pose_embedding=np.random.randn(256).tolist(),
-        timeframe="2024-01-01T10:30:00",
-        chat_history_ref="chat/person_01.json",
-    )
+    seed_rng(seed)
+    with Printer() as p:
+        p("=" * 60)
+        p("Agent & Robot Integration Example")
+        p("=" * 60)
+        p()
+        
+        agent = AgentIntegration()
+        
+        # one float32 draw, sliced into every embedding the flow needs
+        (
+            mug_img_emb, mug_loc_emb,
+            kitchen_emb,
+            person_face_emb, person_pose_emb,
+            query_img_emb,
+            query_face_emb, query_pose_emb,
+        ) = random_vectors([128, 64, 256, 512, 256, 128, 512, 256])
     
-    print("\n4. Object&SceneFinding queries database")
-    objects = agent.find_objects(
-        query_embedding=np.random.randn(128).tolist(),
-        search_type="image",
-        n_results=3
-    )
-    print(f"   Found {len(objects)} objects")
+    with Printer() as p:
+        p("1. Vision detects objects")
+        agent.process_object_detection(
+            object_id="mug_01",
+            object_xyz=(1.0, 2.0, 0.0),
+            object_image_path="images/mug_01.png",
+            object_embedding=mug_img_emb,
+            location_embedding=mug_loc_emb,
+            printer=p,
+        )
     
-    scenes = agent.find_scenes(
-        slam_coords=(2.4, 3.0, 0.0),
-        radius=1.0,
-        n_results=3
-    )
-    print(f"   Found {len(scenes)} scenes")
+    with Printer() as p:
+        p("\n2. Vision detects scenes")
+        agent.process_scene_detection(
+            scene_id="kitchen_01",
+            slam_xyz=(2.5, 3.1, 0.0),
+            scene_image_path="images/kitchen_01.png",
+            scene_embedding=kitchen_emb,
+            printer=p,
+        )
     
-    print("\n5. PeopleFinding queries database")
-    people_by_face = agent.find_people(
-        face_embedding=np.random.randn(512).tolist(),
-        n_results=3
-    )
-    print(f"   Found {len(people_by_face)} people by face")
+    with Printer() as p:
+        p("\n3. Vision detects people")
+        agent.process_people_detection(
+            person_id="person_01",
+            people_xyz=(4.0, 5.0, 0.0),
+            face_embedding=person_face_emb,
+            pose_embedding=person_pose_emb,
+            timeframe="2024-01-01T10:30:00",
+            chat_history_ref="chat/person_01.json",
+            printer=p,
+        )
     
-    people_by_pose = agent.find_people(
-        pose_embedding=np.random.randn(256).tolist(),
-        n_results=3
+    # the finding queries are independent, so run them concurrently
+    objects, scenes, people_by_face, people_by_pose, person = await asyncio.gather(
+        agent.afind_objects(
+            query_embedding=query_img_emb,
+            search_type="image",
+            n_results=3
+        ),
+        agent.afind_scenes(
+            slam_coords=(2.4, 3.0, 0.0),
+            radius=1.0,
+            n_results=3
+        ),
+        agent.afind_people(
+            face_embedding=query_face_emb,
+            n_results=3
+        ),
+        agent.afind_people(
+            pose_embedding=query_pose_emb,
+            n_results=3
+        ),
+        agent.aget_person_by_face_id("person_01"),
     )
-    print(f"   Found {len(people_by_pose)} people by pose")
     
-    person = agent.get_person_by_face_id("person_01")
-    if person:
-        print(f"   Found person by FaceID: {person['person_id']}")
+    with Printer() as p:
+        p("\n4. Object&SceneFinding queries database")
+        p(f"   Found {len(objects)} objects")
+        p(f"   Found {len(scenes)} scenes")
     
-    print("\n6. ControlRobot gets coordinates for navigation")
-    coords = agent.get_object_coordinates("mug_01")
-    if coords:
-        print(f"   Object 'mug_01' is at: {coords}")
-        print(f"   Robot can navigate to: Go to object ({coords[0]}, {coords[1]})")
-    
-    scene_coords = agent.get_scene_coordinates("kitchen_01")
-    if scene_coords:
-        print(f"   Scene 'kitchen_01' is at SLAM: {scene_coords}")
+    with Printer() as p:
+        p("\n5. PeopleFinding queries database")
+        p(f"   Found {len(people_by_face)} people by face")
+        p(f"   Found {len(people_by_pose)} people by pose")
+        if person:
+            p(f"   Found person by FaceID: {person['person_id']}")
     
-    person_coords = agent.get_person_coordinates("person_01")
-    if person_coords:
-        print(f"   Person 'person_01' is at: {person_coords}")
+    with Printer() as p:
+        p("\n6. ControlRobot gets coordinates for navigation")
+        coords = agent.get_object_coordinates("mug_01")
+        if coords:
+            p(f"   Object 'mug_01' is at: {coords}")
+            p(f"   Robot can navigate to: Go to object ({coords[0]}, {coords[1]})")
+        
+        scene_coords = agent.get_scene_coordinates("kitchen_01")
+        if scene_coords:
+            p(f"   Scene 'kitchen_01' is at SLAM: {scene_coords}")
+        
+        person_coords = agent.get_person_coordinates("person_01")
+        if person_coords:
+            p(f"   Person 'person_01' is at: {person_coords}")
     
-    print("\n" + "=" * 60)
-    print("Integration example complete")
-    print("=" * 60)
+    with Printer() as p:
+        p("\n" + "=" * 60)
+        p("Integration example complete")
+        p("=" * 60)
 
 
 if __name__ == "__main__":
-    example_agent_flow()
+    parser = argparse.ArgumentParser(description="Agent & robot integration example")
+    parser.add_argument("--seed", type=int, default=None, help="seed the embedding RNG for reproducible runs")
+    args = parser.parse_args()
+    asyncio.run(example_agent_flow(seed=args.seed))
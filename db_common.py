@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import importlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import chromadb
+
+Embedding = Union[Sequence[float], np.ndarray]
+
+# HNSW build settings shared by every collection (only applied when a collection is created).
+# Embeddings are unit-normalized before they reach Chroma, so inner product gives
+# the cosine distance without hnswlib renormalizing on every comparison.
+HNSW_METADATA = {
+    "hnsw:space": "ip",
+    "hnsw:construction_ef": 64,
+    "hnsw:M": 16,
+    "hnsw:search_ef": 100,
+}
+
+
+@lru_cache(maxsize=None)
+def optional_module(name: str) -> Optional[ModuleType]:
+    """Import an optional accelerator (numba, scipy, simsimd, usearch) on first
+    use, so importing the DB modules stays cheap; None when it is not installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+# one PersistentClient and one handle per collection for each DB directory, shared by every DB object
+_CLIENTS: Dict[str, "chromadb.ClientAPI"] = {}
+_COLLECTIONS: Dict[Tuple[str, str], "chromadb.Collection"] = {}
+_CLIENT_LOCK = threading.RLock()
+
+
+def get_client(persist_directory: str) -> "chromadb.ClientAPI":
+    """Shared chromadb.PersistentClient for persist_directory"""
+    path = os.path.abspath(persist_directory)
+    with _CLIENT_LOCK:
+        client = _CLIENTS.get(path)
+        if client is None:
+            # imported on first use: chromadb is slow to import and heavy, and
+            # code that only builds records never needs it
+            import chromadb
+
+            client = _CLIENTS[path] = chromadb.PersistentClient(path=path)
+        return client
+
+
+def get_collection(persist_directory: str, name: str) -> "chromadb.Collection":
+    """Shared handle to collection name, created with HNSW_METADATA if missing"""
+    key = (os.path.abspath(persist_directory), name)
+    with _CLIENT_LOCK:
+        col = _COLLECTIONS.get(key)
+        if col is None:
+            col = _COLLECTIONS[key] = get_client(persist_directory).get_or_create_collection(
+                name=name,
+                metadata=HNSW_METADATA,
+            )
+        return col
+
+
+@dataclass
+class QueryConfig:
+    """Query-time HNSW settings; a larger ef_search trades latency for recall"""
+    ef_search: int = 100
+
+
+def as_f32(embedding: Embedding) -> np.ndarray:
+    """C-contiguous float32 copy of an embedding (no copy if it already is one)"""
+    return np.ascontiguousarray(embedding, dtype=np.float32)
+
+
+def l2_normalize(embedding: Embedding) -> np.ndarray:
+    """Unit-length float32 copy of an embedding; zero vectors pass through"""
+    v = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+def l2_normalize_rows(mat: np.ndarray) -> np.ndarray:
+    """Unit-normalize each row of a float32 (N, D) matrix in place"""
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    np.divide(mat, norms, out=mat, where=norms > 0)
+    return mat
+
+
+# packed-xyz metadata key written by an earlier version; Chroma upserts merge
+# metadata, so older rows keep it next to (possibly newer) *_x/_y/_z values.
+# It is never read, only left out of returned dicts.
+XYZ_KEY = "xyz_b64"
+
+
+def xyz_reader(prefix: str) -> Callable[[Dict[str, Any]], Tuple[Any, Any, Any]]:
+    """Read the xyz tuple of a metadata dict from its {prefix}_x/_y/_z keys"""
+    return itemgetter(f"{prefix}_x", f"{prefix}_y", f"{prefix}_z")
+
+
+def hit_builder(prefix: str) -> Callable[..., Dict[str, Any]]:
+    """Build returned dicts from stored metadata: {prefix}_xyz is added and the
+    stale XYZ_KEY blob of older rows is left out"""
+    read = xyz_reader(prefix)
+    xyz_field = f"{prefix}_xyz"
+
+    def build(meta: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+        hit = {**meta, xyz_field: read(meta), **extra}
+        if XYZ_KEY in hit:
+            del hit[XYZ_KEY]
+        return hit
+
+    return build
+
+
+def quantize_i8(embedding: Embedding) -> Tuple[np.ndarray, float]:
+    """Symmetric int8 quantization; v is recovered as codes * scale / 127"""
+    v = np.asarray(embedding, dtype=np.float32)
+    scale = float(np.max(np.abs(v))) if v.size else 0.0
+    if scale == 0.0:
+        return np.zeros(v.shape, dtype=np.int8), 0.0
+    return np.round(v * (127.0 / scale)).astype(np.int8), scale
+
+
+def encode_i8(codes: np.ndarray) -> str:
+    """Pack int8 codes into a string that fits in Chroma metadata"""
+    return base64.b64encode(np.ascontiguousarray(codes, dtype=np.int8).tobytes()).decode("ascii")
+
+
+def decode_i8(blob: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(blob), dtype=np.int8)
+
+
+def cosine_distances_i8(query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Cosine distance from an int8 query to each row of an int8 (K, D) matrix"""
+    # optional: falls back to an int32 NumPy matmul
+    simsimd = optional_module("simsimd")
+    if simsimd is not None:
+        return np.asarray(simsimd.cdist(query[np.newaxis], candidates, metric="cosine"))[0]
+    q = query.astype(np.int32)
+    c = candidates.astype(np.int32)
+    norms = np.sqrt(np.einsum("ij,ij->i", c, c) * float(q @ q))
+    return 1.0 - (c @ q) / np.maximum(norms, 1e-12)
+
+
+class EmbeddingMatrix:
+    """In-memory SoA store for one embedding type.
+
+    Unit-normalized float32 rows live in one contiguous (capacity, D) matrix
+    (plus an int8 copy for quantized scoring) that grows 2x on overflow, with
+    parallel id/metadata lists and an id -> row map. Deleting moves the last
+    row into the hole, so rows [:len] are always dense.
+
+    With ann=True and usearch installed, quantized searches go through an
+    int8 USearch HNSW index instead of scanning every code. Rows move on
+    delete, so the index is keyed by a stable per-id integer.
+    """
+
+    def __init__(self, capacity: int = 1024, ann: bool = False, ef_search: int = 100) -> None:
+        self._capacity = capacity
+        self._mat: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.metas: List[Dict[str, Any]] = []
+        # optional: quantized search falls back to a brute-force int8 scan
+        self._use_ann = ann and optional_module("usearch.index") is not None
+        self._ann: Optional[Any] = None
+        self._ef_search = ef_search
+        self._keys: Dict[str, int] = {}
+        self._key_ids: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _reserve(self, n: int, dim: int) -> None:
+        if self._mat is None:
+            capacity = max(self._capacity, n)
+            self._mat = np.empty((capacity, dim), dtype=np.float32)
+            self._codes = np.empty((capacity, dim), dtype=np.int8)
+        elif n > self._mat.shape[0]:
+            capacity = max(n, 2 * self._mat.shape[0])
+            size = len(self.ids)
+            mat = np.empty((capacity, dim), dtype=np.float32)
+            codes = np.empty((capacity, dim), dtype=np.int8)
+            mat[:size] = self._mat[:size]
+            codes[:size] = self._codes[:size]
+            self._mat, self._codes = mat, codes
+
+    def upsert(self, key: str, embedding: Embedding, codes: np.ndarray, meta: Dict[str, Any]) -> None:
+        v = np.asarray(embedding, dtype=np.float32).ravel()
+        dim = v.shape[0] if self._mat is None else self._mat.shape[1]
+        if v.shape != (dim,) or codes.shape != (dim,):
+            raise ValueError(f"expected {dim}-d embedding and codes, got {v.shape[0]} and {codes.shape}")
+        row = self.index.get(key)
+        if row is None:
+            row = len(self.ids)
+            self._reserve(row + 1, v.shape[0])
+            self.ids.append(key)
+            self.metas.append(meta)
+            self.index[key] = row
+        else:
+            self.metas[row] = meta
+        norm = np.linalg.norm(v)
+        self._mat[row] = v / norm if norm else v
+        self._codes[row] = codes
+        if self._use_ann:
+            self._ann_add(key, self._mat[row])
+
+    def _ann_add(self, key: str, unit: np.ndarray) -> None:
+        if self._ann is None:
+            self._ann = optional_module("usearch.index").Index(
+                ndim=unit.shape[0],
+                metric="cos",
+                dtype="i8",
+                connectivity=HNSW_METADATA["hnsw:M"],
+                expansion_add=HNSW_METADATA["hnsw:construction_ef"],
+                expansion_search=self._ef_search,
+            )
+        label = self._keys.get(key)
+        if label is None:
+            label = self._keys[key] = len(self._key_ids)
+            self._key_ids[label] = key
+        else:
+            self._ann.remove(label)
+        self._ann.add(label, unit)
+
+    def set_ef_search(self, ef_search: int) -> None:
+        self._ef_search = ef_search
+        if self._ann is not None:
+            self._ann.expansion_search = ef_search
+
+    def remove(self, key: str) -> None:
+        row = self.index.pop(key, None)
+        if row is None:
+            return
+        if self._ann is not None:
+            # the label stays reserved for key so a later re-insert reuses it
+            self._ann.remove(self._keys[key])
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            self._mat[row] = self._mat[last]
+            self._codes[row] = self._codes[last]
+            self.ids[row] = moved
+            self.metas[row] = self.metas[last]
+            self.index[moved] = row
+        self.ids.pop()
+        self.metas.pop()
+
+    def row(self, i: int) -> np.ndarray:
+        return self._mat[i].copy()
+
+    def search(
+        self,
+        queries: Sequence[Embedding],
+        k: int,
+        quantized: bool = False,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top-k (rows, cosine distances) for each query, nearest first"""
+        n = len(self.ids)
+        k = min(k, n)
+        if k <= 0:
+            return [(np.empty(0, dtype=np.intp), np.empty(0)) for _ in queries]
+
+        if quantized and self._ann is not None:
+            return [self._ann_search(q, k) for q in queries]
+        if quantized:
+            dists = np.stack([
+                cosine_distances_i8(quantize_i8(q)[0], self._codes[:n]) for q in queries
+            ])
+        else:
+            q = np.stack([np.asarray(e, dtype=np.float32).ravel() for e in queries])
+            q /= np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+            dists = 1.0 - q @ self._mat[:n].T
+
+        results: List[Tuple[np.ndarray, np.ndarray]] = []
+        for d in dists:
+            top = np.argpartition(d, k - 1)[:k] if k < n else np.arange(n)
+            top = top[np.argsort(d[top], kind="stable")]
+            results.append((top, d[top]))
+        return results
+
+    def _ann_search(self, query: Embedding, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        matches = self._ann.search(np.asarray(query, dtype=np.float32).ravel(), k)
+        rows = np.fromiter(
+            (self.index[self._key_ids[int(label)]] for label in matches.keys),
+            dtype=np.intp,
+            count=len(matches.keys),
+        )
+        return rows, matches.distances
+
+
+def embedding_digest(embedding: Embedding) -> bytes:
+    """16-byte blake2b of the float32 bytes of an embedding"""
+    data = np.ascontiguousarray(embedding, dtype=np.float32).tobytes()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class QueryCache:
+    """LRU of query hit lists keyed by (key prefix, embedding digest).
+
+    Callers put their DB generation in the prefix, so every write makes the
+    older entries unreachable and they age out. Hits are copied on the way in
+    and out because callers mutate them.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Hashable, ...], List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        prefix: Tuple[Hashable, ...],
+        query_embeddings: Sequence[Embedding],
+        run: Callable[[List[Embedding]], List[List[Dict[str, Any]]]],
+    ) -> List[List[Dict[str, Any]]]:
+        """Serve each query from the cache, calling run once with all the misses.
+
+        Query embeddings are converted to float32 arrays once here (ndarrays
+        that already are pass through untouched), so hashing, normalization
+        and the backend all share the same buffer.
+        """
+        query_embeddings = [as_f32(e) for e in query_embeddings]
+        keys = [(*prefix, embedding_digest(e)) for e in query_embeddings]
+        results: List[Optional[List[Dict[str, Any]]]] = []
+        with self._lock:
+            for key in keys:
+                hits = self._entries.get(key)
+                if hits is not None:
+                    self._entries.move_to_end(key)
+                    hits = [dict(hit) for hit in hits]
+                results.append(hits)
+
+        missing = [i for i, hits in enumerate(results) if hits is None]
+        if missing:
+            fresh = run([query_embeddings[i] for i in missing])
+            with self._lock:
+                for i, hits in zip(missing, fresh):
+                    results[i] = hits
+                    self._entries[keys[i]] = [dict(hit) for hit in hits]
+                    self._entries.move_to_end(keys[i])
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+        return results
+
+
+def apply_query_config(collection: Any, config: QueryConfig) -> None:
+    """Set ef_search on a Chroma collection"""
+    try:
+        collection.modify(configuration={"hnsw": {"ef_search": config.ef_search}})
+    except TypeError:
+        # chromadb < 1.0 has no collection configuration and reads search_ef from metadata
+        metadata = {k: v for k, v in (collection.metadata or {}).items() if k != "hnsw:space"}
+        collection.modify(metadata={**metadata, "hnsw:search_ef": config.ef_search})
+
+
+def read_query_config(collection: Any) -> QueryConfig:
+    """The query-time settings a Chroma collection currently has; they persist
+    with the collection, so a fresh handle must not assume the defaults"""
+    configuration = getattr(collection, "configuration", None)
+    hnsw = configuration.get("hnsw") if isinstance(configuration, dict) else None
+    if hnsw and hnsw.get("ef_search") is not None:
+        return QueryConfig(ef_search=int(hnsw["ef_search"]))
+    # chromadb < 1.0 reads search_ef from metadata
+    metadata = collection.metadata or {}
+    return QueryConfig(ef_search=int(metadata.get("hnsw:search_ef", QueryConfig.ef_search)))
+
+
+__all__ = [
+    "Embedding",
+    "HNSW_METADATA",
+    "QueryConfig",
+    "get_client",
+    "get_collection",
+    "optional_module",
+    "as_f32",
+    "l2_normalize",
+    "l2_normalize_rows",
+    "XYZ_KEY",
+    "xyz_reader",
+    "hit_builder",
+    "quantize_i8",
+    "encode_i8",
+    "decode_i8",
+    "cosine_distances_i8",
+    "EmbeddingMatrix",
+    "embedding_digest",
+    "QueryCache",
+    "apply_query_config",
+    "read_query_config",
+]
@@ -1,53 +1,54 @@
 from __future__ import annotations
 
-import numpy as np
+import argparse
+from typing import Optional
 
+from example_utils import random_vectors, seed_rng
 from object_db import ObjectRecord, ObjectVectorDB
 
 
-def random_vector(dim: int) -> list[float]:
-    # generate random normalized vector
-    v = np.random.randn(dim).astype(np.float32)
-    v /= np.linalg.norm(v) + 1e-8
-    return v.tolist()
+def main(seed: Optional[int] = None) -> None:
+    seed_rng(seed)
+    db = ObjectVectorDB.get("chroma_db")
 
-
-def main() -> None:
-    db = ObjectVectorDB(persist_directory="chroma_db")
+    (
+        mug_img_emb, mug_loc_emb,
+        bottle_img_emb, bottle_loc_emb,
+        query_img_emb, query_loc_emb,
+    ) = random_vectors([128, 64, 128, 64, 128, 64])
 
     obj1 = ObjectRecord(
         object_id="mug_01",
         object_xyz=(1.0, 2.0, 0.0),
         object_image_ref="images/mug_01.png",
-        object_embedding=random_vector(128),
-        location_embedding=random_vector(64),
+        object_embedding=mug_img_emb,
+        location_embedding=mug_loc_emb,
     )
 
     obj2 = ObjectRecord(
         object_id="bottle_01",
         object_xyz=(3.5, -1.2, 0.0),
         object_image_ref="images/bottle_01.png",
-        object_embedding=random_vector(128),
-        location_embedding=random_vector(64),
+        object_embedding=bottle_img_emb,
+        location_embedding=bottle_loc_emb,
     )
 
-    db.upsert(obj1)
-    db.upsert(obj2)
+    db.upsert_many([obj1, obj2])
 
-    query_img_emb = random_vector(128)
-    image_hits = db.query_by_image_embedding(query_img_emb, n_results=2)
+    image_hits, location_hits = db.query_multi(query_img_emb, query_loc_emb, n_results=2)
     print("Nearest objects by image embedding:")
     for hit in image_hits:
         print(hit)
 
-    query_loc_emb = random_vector(64)
-    location_hits = db.query_by_location_embedding(query_loc_emb, n_results=2)
     print("\nNearest objects by location embedding:")
     for hit in location_hits:
         print(hit)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Minimal ObjectVectorDB example")
+    parser.add_argument("--seed", type=int, default=None, help="seed the embedding RNG for reproducible runs")
+    args = parser.parse_args()
+    main(seed=args.seed)
 
 
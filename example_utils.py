@@ -0,0 +1,60 @@
+"""Random embedding helpers shared by the example scripts"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from db_common import optional_module
+
+# shared embedding generator; seed_rng() resets it for reproducible runs
+RNG = np.random.default_rng()
+
+
+def seed_rng(seed: Optional[int]) -> None:
+    global RNG
+    if seed is not None:
+        RNG = np.random.default_rng(seed)
+
+
+def _normalize(v):
+    s = 0.0
+    for x in v:
+        s += x * x
+    inv = 1.0 / (math.sqrt(s) + 1e-8)
+    for i in range(v.size):
+        v[i] *= inv
+
+
+def _normalize_np(v: np.ndarray) -> None:
+    v /= np.linalg.norm(v) + 1e-8
+
+
+@lru_cache(maxsize=None)
+def _normalizer() -> Callable[[np.ndarray], None]:
+    # optional: without numba a single vector is normalized with NumPy
+    numba = optional_module("numba")
+    if numba is None:
+        return _normalize_np
+    return numba.njit(cache=True, fastmath=True)(_normalize)
+
+
+def random_vectors(dims: Sequence[int]) -> List[np.ndarray]:
+    # generate several random normalized vectors from a single draw
+    arr = RNG.standard_normal(sum(dims), dtype=np.float32)
+    if len(dims) == 1:
+        # one small vector: the JIT loop has none of NumPy's per-call overhead
+        _normalizer()(arr)
+        return [arr]
+    offsets = np.cumsum(dims)[:-1]
+    norms = np.sqrt(np.add.reduceat(arr * arr, np.concatenate(([0], offsets))))
+    arr /= np.repeat(norms + 1e-8, dims)
+    return np.split(arr, offsets)
+
+
+def random_vector(dim: int) -> np.ndarray:
+    # single-vector form kept for older callers
+    return random_vectors([dim])[0]
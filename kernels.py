@@ -0,0 +1,94 @@
+"""Numba kernels for the hot loops.
+
+cosine_kernel: cosine distances specialized per embedding dimension. The
+dimension is baked into the generated source as a constant, so Numba can
+fully unroll the inner loop with no tail handling. Kernels are compiled once
+per dimension and cached.
+
+radius_kernel: the SLAM radius scan over the scene coordinate buffer.
+
+Numba is imported the first time a kernel is requested; without it both
+return None and callers fall back to SimSIMD / NumPy.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Callable, Optional
+
+from db_common import optional_module
+
+# embedding sizes used across the DBs (location, object, scene/pose, face)
+KERNEL_DIMS = frozenset({64, 128, 256, 512})
+
+_SOURCE = """
+def cosine_distances(query, candidates, out):
+    for j in range(candidates.shape[0]):
+        dot = 0.0
+        qq = 0.0
+        cc = 0.0
+        for i in range({dim}):
+            q = query[i]
+            c = candidates[j, i]
+            dot += q * c
+            qq += q * q
+            cc += c * c
+        denom = math.sqrt(qq * cc)
+        out[j] = 1.0 - dot / denom if denom > 1e-12 else 1.0
+"""
+
+
+@lru_cache(maxsize=None)
+def cosine_kernel(dim: int) -> Optional[Callable[..., None]]:
+    """Compiled kernel(query, candidates, out) writing the cosine distance from
+    a float32 (dim,) query to each row of a C-contiguous float32 (K, dim)
+    matrix into a float64 (K,) out; None when numba is missing or dim is not
+    one of KERNEL_DIMS"""
+    numba = optional_module("numba")
+    if numba is None or dim not in KERNEL_DIMS:
+        return None
+    namespace = {"math": math}
+    exec(_SOURCE.format(dim=dim), namespace)
+    return numba.njit("void(float32[::1], float32[:, ::1], float64[::1])", fastmath=True)(
+        namespace["cosine_distances"]
+    )
+
+
+def _radius_filter(xyz, q, r2, out_idx, out_d2):
+    """Write the rows of float64 (N, 3) xyz within sqrt(r2) of q, and their
+    squared distances, to the front of out_idx/out_d2; returns the count"""
+    r = math.sqrt(r2)
+    n = 0
+    for i in range(xyz.shape[0]):
+        # per-axis bounding-box test first; most scenes are far and exit here
+        dx = xyz[i, 0] - q[0]
+        if abs(dx) > r:
+            continue
+        dy = xyz[i, 1] - q[1]
+        if abs(dy) > r:
+            continue
+        dz = xyz[i, 2] - q[2]
+        if abs(dz) > r:
+            continue
+        d2 = dx * dx + dy * dy + dz * dz
+        if d2 <= r2:
+            out_idx[n] = i
+            out_d2[n] = d2
+            n += 1
+    return n
+
+
+@lru_cache(maxsize=None)
+def radius_kernel() -> Optional[Callable[..., int]]:
+    """Compiled radius_filter(xyz, q, r2, out_idx, out_d2); None when numba is
+    missing"""
+    numba = optional_module("numba")
+    if numba is None:
+        return None
+    # free scene slots are marked with inf, so only FMA contraction is enabled:
+    # full fastmath assumes no infs and could let those slots through
+    return numba.njit(cache=True, fastmath={"contract"})(_radius_filter)
+
+
+__all__ = ["KERNEL_DIMS", "cosine_kernel", "radius_kernel"]
@@ -1,48 +1,81 @@
 from __future__ import annotations
 
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Sequence, Dict, Any, Optional
-
-import chromadb
-
-
-@dataclass
+from typing import List, Sequence, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from db_common import (
+    Embedding,
+    QueryCache,
+    QueryConfig,
+    apply_query_config,
+    read_query_config,
+    as_f32,
+    get_client,
+    get_collection,
+    l2_normalize,
+    l2_normalize_rows,
+    hit_builder,
+    optional_module,
+    xyz_reader,
+)
+from kernels import radius_kernel
+
+
+_object_hit = hit_builder("object")
+_scene_hit = hit_builder("scene")
+_scene_xyz = xyz_reader("scene")
+
+
+# eq=False: ndarray fields have no scalar ==, so records compare (and hash) by identity
+@dataclass(slots=True, frozen=True, eq=False)
 class ObjectRecord:
     object_id: str
     object_xyz: Sequence[float]
     object_image_ref: str
-    object_embedding: Sequence[float]
-    location_embedding: Sequence[float]
+    object_embedding: np.ndarray
+    location_embedding: np.ndarray
     scene_id: Optional[str] = None
 
+    def __post_init__(self) -> None:
+        # embeddings are converted to float32 once here; upsert hands them to Chroma as-is
+        object.__setattr__(self, "object_embedding", as_f32(self.object_embedding))
+        object.__setattr__(self, "location_embedding", as_f32(self.location_embedding))
 
-@dataclass
+
+@dataclass(slots=True, frozen=True, eq=False)
 class SceneRecord:
     scene_id: str
     scene_xyz: Sequence[float]
     scene_image_ref: str
-    scene_embedding: Sequence[float]
-
-
-class ObjectVectorDB:
-    def __init__(self, persist_directory: str = "chroma_db") -> None:
-        self._client = chromadb.PersistentClient(path=persist_directory)
-
-        self._image_col = self._client.get_or_create_collection(
-            name="objects_image",
-            metadata={"hnsw:space": "cosine"},
-        )
-        self._location_col = self._client.get_or_create_collection(
-            name="objects_location",
-            metadata={"hnsw:space": "cosine"},
-        )
-        self._scene_col = self._client.get_or_create_collection(
-            name="scenes",
-            metadata={"hnsw:space": "cosine"},
-        )
-
-    def upsert(self, record: ObjectRecord) -> None:
-        xyz = list(record.object_xyz)
+    scene_embedding: np.ndarray
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "scene_embedding", as_f32(self.scene_embedding))
+
+
+def _build_batch(
+    records: List[ObjectRecord],
+) -> Tuple[List[str], np.ndarray, np.ndarray, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Flatten records into object ids, (N, D) float32 image/location matrices
+    and per-collection metadatas in one pass"""
+    n = len(records)
+    ids: List[str] = []
+    image_metas: List[Dict[str, Any]] = []
+    location_metas: List[Dict[str, Any]] = []
+    if n == 0:
+        empty = np.empty((0, 0), dtype=np.float32)
+        return ids, empty, empty, image_metas, location_metas
+
+    image = np.empty((n, len(records[0].object_embedding)), dtype=np.float32)
+    location = np.empty((n, len(records[0].location_embedding)), dtype=np.float32)
+    for i, record in enumerate(records):
+        xyz = record.object_xyz
         if len(xyz) != 3:
             raise ValueError("object_xyz must have length 3")
 
@@ -56,119 +89,399 @@ class ObjectVectorDB:
         if record.scene_id:
             base_meta["scene_id"] = record.scene_id
 
+        ids.append(record.object_id)
+        image[i] = record.object_embedding
+        location[i] = record.location_embedding
+        image_metas.append({**base_meta, "embedding_type": "image"})
+        location_metas.append({**base_meta, "embedding_type": "location"})
+
+    return ids, image, location, image_metas, location_metas
+
+
+class ObjectVectorDB:
+    _INSTANCES: Dict[str, "ObjectVectorDB"] = {}
+    _INSTANCES_LOCK = threading.Lock()
+    _opened = False
+
+    # upsert() buffers records and writes them in one batch once this many are pending
+    FLUSH_THRESHOLD = 512
+    # scenes taken from the radius prefilter before find_scenes_by_slam_coords re-ranks by embedding
+    RERANK_CANDIDATES = 50
+
+    def __new__(cls, persist_directory: str = "chroma_db") -> "ObjectVectorDB":
+        # one instance per directory: RAM state is per instance, so two
+        # handles on the same files would drift apart after a write
+        key = os.path.abspath(persist_directory)
+        with cls._INSTANCES_LOCK:
+            db = cls._INSTANCES.get(key)
+            if db is None:
+                db = cls._INSTANCES[key] = super().__new__(cls)
+        return db
+
+    @classmethod
+    def get(cls, persist_directory: str = "chroma_db") -> "ObjectVectorDB":
+        """Return the shared handle for persist_directory, opening it on first use"""
+        return cls(persist_directory)
+
+    def __init__(self, persist_directory: str = "chroma_db") -> None:
+        with self._INSTANCES_LOCK:
+            if not self._opened:
+                self._open(persist_directory)
+                self._opened = True
+
+    def _open(self, persist_directory: str) -> None:
+        self._client = get_client(persist_directory)
+        self._persist_directory = persist_directory
+
+        self._image_col = get_collection(persist_directory, "objects_image")
+        self._location_col = get_collection(persist_directory, "objects_location")
+        self._scene_col = get_collection(persist_directory, "scenes")
+
+        # stored with the collections; keys the query cache
+        self._query_config = read_query_config(self._image_col)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cache = QueryCache()
+        # bumped on every write so callers can invalidate their own caches
+        self.generation = 0
+
+        # SoA float64 scene SLAM coordinates kept in step with the scene
+        # collection; deleted slots hold inf so they never pass the radius test,
+        # and are reused through the free-list. The KD-tree is rebuilt lazily
+        # after writes.
+        self._scene_xyz = np.full((64, 3), np.inf)
+        self._scene_ids: List[Optional[str]] = []
+        self._scene_slots: Dict[str, int] = {}
+        self._scene_free: List[int] = []
+        self._scene_kdtree: Optional[Any] = None
+        self._scene_kdtree_dirty = True
+        self._scene_tree_slots: Optional[np.ndarray] = None
+        # output buffers for kernels.radius_kernel, grown with the coordinate buffer
+        self._radius_idx: Optional[np.ndarray] = None
+        self._radius_d2: Optional[np.ndarray] = None
+        # rebuilt from the scene collection on every open; any client may have
+        # moved a scene since this process last saw it
+        self._load_scene_index()
+
+        # dense object id -> row map over the image-collection metadata, so
+        # get_object never goes to Chroma; rebuilt from the collection on open
+        self._obj_id_to_idx: Dict[str, int] = {}
+        self._rows: List[Dict[str, Any]] = []
+        self._load_object_rows()
+
+        # objects written by upsert() but not yet sent to Chroma; every read flushes first
+        self._pending: List[ObjectRecord] = []
+        # guards _pending and the row index; reentrant because upsert() and
+        # upsert_many() flush while holding it
+        self._write_lock = threading.RLock()
+
+    def __enter__(self) -> "ObjectVectorDB":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+    def _load_object_rows(self) -> None:
+        rows = self._image_col.get(include=["metadatas"]).get("metadatas") or []
+        self._rows = [dict(meta) for meta in rows]
+        self._obj_id_to_idx = {meta["object_id"]: i for i, meta in enumerate(self._rows)}
+
+    def close(self) -> None:
+        """Flush pending objects; a clean handle writes nothing"""
+        self.flush()
+
+    def configure_search(self, config: QueryConfig) -> None:
+        """Apply query-time HNSW settings to the object and scene collections"""
+        if config == self._query_config:
+            return
+        for col in (self._image_col, self._location_col, self._scene_col):
+            apply_query_config(col, config)
+        self._query_config = config
+
+    def upsert(self, record: ObjectRecord) -> None:
+        """Queue an object; it is written with the next flush()"""
+        with self._write_lock:
+            self._check_queueable(record)
+            self._pending.append(record)
+            # queued writes count too, so generation-keyed caches never serve the old record
+            self.generation += 1
+            if len(self._pending) >= self.FLUSH_THRESHOLD:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write all objects queued by upsert() in one batch"""
+        # the lock is held through the write so a concurrent reader waits for
+        # the batch instead of seeing an empty queue and reading around it
+        with self._write_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            try:
+                self._write_objects(pending)
+            except BaseException:
+                # a failed write leaves the batch queued for the next flush
+                self._pending[:0] = pending
+                raise
+
+    def _check_queueable(self, record: ObjectRecord) -> None:
+        # reject a bad record up front rather than failing the whole batch at flush time
+        if len(record.object_xyz) != 3:
+            raise ValueError("object_xyz must have length 3")
+        dims = (record.object_embedding.shape, record.location_embedding.shape)
+        if len(dims[0]) != 1 or len(dims[1]) != 1:
+            raise ValueError("object_embedding and location_embedding must be 1-D")
+        if self._pending:
+            first = self._pending[0]
+            if dims != (first.object_embedding.shape, first.location_embedding.shape):
+                raise ValueError(
+                    f"embedding dimensions {dims} do not match the queued batch"
+                )
+
+    def upsert_many(self, records: Sequence[ObjectRecord]) -> None:
+        """Store several objects with one write per collection"""
+        with self._write_lock:
+            self.flush()
+            self._write_objects(records)
+
+    def _write_objects(self, records: Sequence[ObjectRecord]) -> None:
+        # callers hold _write_lock
+        if not records:
+            return
+
+        # Chroma rejects duplicate ids in one upsert; the last write per object wins
+        records = list({record.object_id: record for record in records}.values())
+        ids, image_embeddings, location_embeddings, image_metas, location_metas = _build_batch(
+            records
+        )
+        l2_normalize_rows(image_embeddings)
+        l2_normalize_rows(location_embeddings)
+
         self._image_col.upsert(
-            ids=[f"{record.object_id}::image"],
-            embeddings=[list(record.object_embedding)],
-            metadatas=[{**base_meta, "embedding_type": "image"}],
-            documents=[""],
+            ids=[f"{object_id}::image" for object_id in ids],
+            embeddings=image_embeddings,
+            metadatas=image_metas,
         )
 
         self._location_col.upsert(
-            ids=[f"{record.object_id}::location"],
-            embeddings=[list(record.location_embedding)],
-            metadatas=[{**base_meta, "embedding_type": "location"}],
-            documents=[""],
+            ids=[f"{object_id}::location" for object_id in ids],
+            embeddings=location_embeddings,
+            metadatas=location_metas,
         )
 
+        for object_id, meta in zip(ids, image_metas):
+            row = self._obj_id_to_idx.get(object_id)
+            if row is None:
+                self._obj_id_to_idx[object_id] = len(self._rows)
+                self._rows.append(meta)
+            else:
+                self._rows[row] = meta
+        self.generation += 1
+
     def delete_object(self, object_id: str) -> None:
-        self._image_col.delete(ids=[f"{object_id}::image"])
-        self._location_col.delete(ids=[f"{object_id}::location"])
+        with self._write_lock:
+            self.flush()
+            self._image_col.delete(ids=[f"{object_id}::image"])
+            self._location_col.delete(ids=[f"{object_id}::location"])
+
+            row = self._obj_id_to_idx.pop(object_id, None)
+            if row is not None:
+                # keep rows dense by moving the last row into the hole
+                last = self._rows.pop()
+                if row < len(self._rows):
+                    self._rows[row] = last
+                    self._obj_id_to_idx[last["object_id"]] = row
+            self.generation += 1
 
     def get_object(self, object_id: str) -> Optional[Dict[str, Any]]:
-        result = self._image_col.get(
-            ids=[f"{object_id}::image"],
-            include=["metadatas"],
-        )
+        with self._write_lock:
+            self.flush()
+            row = self._obj_id_to_idx.get(object_id)
+            if row is None:
+                return None
 
-        if not result or not result.get("metadatas"):
-            return None
-
-        meta = dict(result["metadatas"][0])
-        meta["object_xyz"] = [
-            meta.get("object_x"),
-            meta.get("object_y"),
-            meta.get("object_z"),
-        ]
-        return meta
+            return _object_hit(self._rows[row])
 
     def _query(
         self,
-        query_embedding: Sequence[float],
+        query_embedding: Embedding,
         embedding_type: str,
         n_results: int = 5,
+        include_embeddings: bool = False,
     ) -> List[Dict[str, Any]]:
+        return self._query_many(
+            query_embeddings=[query_embedding],
+            embedding_type=embedding_type,
+            n_results=n_results,
+            include_embeddings=include_embeddings,
+        )[0]
+
+    def _query_many(
+        self,
+        query_embeddings: Sequence[Embedding],
+        embedding_type: str,
+        n_results: int = 5,
+        include_embeddings: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        self.flush()
         col = self._image_col if embedding_type == "image" else self._location_col
+        return self._cache.lookup(
+            (embedding_type, n_results, include_embeddings, self._query_config.ef_search, self.generation),
+            query_embeddings,
+            lambda missing: self._query_collection(
+                col, missing, embedding_type, n_results, include_embeddings
+            ),
+        )
 
+    @staticmethod
+    def _query_collection(
+        col: Any,
+        query_embeddings: Sequence[Embedding],
+        embedding_type: str,
+        n_results: int,
+        include_embeddings: bool,
+    ) -> List[List[Dict[str, Any]]]:
+        include = ["metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
         result = col.query(
-            query_embeddings=[list(query_embedding)],
+            query_embeddings=[l2_normalize(e) for e in query_embeddings],
             n_results=n_results,
             where={"embedding_type": embedding_type},
-            include=["metadatas", "distances"],
+            include=include,
         )
 
-        metadatas_batch = result.get("metadatas", [[]])[0]
-        distances_batch = result.get("distances", [[]])[0]
-
-        hits: List[Dict[str, Any]] = []
-        for meta, dist in zip(metadatas_batch, distances_batch):
-            hit = dict(meta)
-            hit["object_xyz"] = [
-                hit.get("object_x"),
-                hit.get("object_y"),
-                hit.get("object_z"),
-            ]
-            hit["distance"] = float(dist)
-            hits.append(hit)
-
-        return hits
+        embeddings_batches = result.get("embeddings")
+        if embeddings_batches is None:
+            embeddings_batches = [None] * len(query_embeddings)
+
+        all_hits: List[List[Dict[str, Any]]] = []
+        for metadatas_batch, distances_batch, embeddings_batch in zip(
+            result.get("metadatas") or [[]] * len(query_embeddings),
+            result.get("distances") or [[]] * len(query_embeddings),
+            embeddings_batches,
+        ):
+            if embeddings_batch is None:
+                all_hits.append([
+                    _object_hit(m, distance=float(d))
+                    for m, d in zip(metadatas_batch, distances_batch)
+                ])
+            else:
+                all_hits.append([
+                    _object_hit(m, distance=float(d), embedding=e)
+                    for m, d, e in zip(metadatas_batch, distances_batch, embeddings_batch)
+                ])
+
+        return all_hits
 
     def query_by_image_embedding(
         self,
-        query_embedding: Sequence[float],
+        query_embedding: Embedding,
         n_results: int = 5,
+        include_embeddings: bool = False,
     ) -> List[Dict[str, Any]]:
         return self._query(
             query_embedding=query_embedding,
             embedding_type="image",
             n_results=n_results,
+            include_embeddings=include_embeddings,
+        )
+
+    def query_by_image_embeddings(
+        self,
+        query_embeddings: Sequence[Embedding],
+        n_results: int = 5,
+        include_embeddings: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several image queries in one call, one hit list per query"""
+        return self._query_many(
+            query_embeddings=query_embeddings,
+            embedding_type="image",
+            n_results=n_results,
+            include_embeddings=include_embeddings,
         )
 
     def query_by_location_embedding(
         self,
-        query_embedding: Sequence[float],
+        query_embedding: Embedding,
         n_results: int = 5,
+        include_embeddings: bool = False,
     ) -> List[Dict[str, Any]]:
         return self._query(
             query_embedding=query_embedding,
             embedding_type="location",
             n_results=n_results,
+            include_embeddings=include_embeddings,
         )
 
+    def query_by_location_embeddings(
+        self,
+        query_embeddings: Sequence[Embedding],
+        n_results: int = 5,
+        include_embeddings: bool = False,
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several location queries in one call, one hit list per query"""
+        return self._query_many(
+            query_embeddings=query_embeddings,
+            embedding_type="location",
+            n_results=n_results,
+            include_embeddings=include_embeddings,
+        )
+
+    def query_multi(
+        self,
+        image_embedding: Embedding,
+        location_embedding: Embedding,
+        n_results: int = 5,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Run an image and a location query concurrently; returns (image_hits, location_hits)"""
+        self.flush()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="object-db-query")
+        image = self._executor.submit(self._query, image_embedding, "image", n_results)
+        location = self._executor.submit(self._query, location_embedding, "location", n_results)
+        return image.result(), location.result()
+
     def upsert_scene(self, record: SceneRecord) -> None:
         """Store a scene"""
-        xyz = list(record.scene_xyz)
-        if len(xyz) != 3:
-            raise ValueError("scene_xyz must have length 3")
-
-        base_meta = {
-            "scene_id": record.scene_id,
-            "scene_x": float(xyz[0]),
-            "scene_y": float(xyz[1]),
-            "scene_z": float(xyz[2]),
-            "scene_image_ref": record.scene_image_ref,
-            "record_type": "scene",
-        }
+        self.upsert_scenes_many([record])
+
+    def upsert_scenes_many(self, records: Sequence[SceneRecord]) -> None:
+        """Store several scenes with one write"""
+        if not records:
+            return
+
+        ids: List[str] = []
+        embeddings: List[np.ndarray] = []
+        metadatas: List[Dict[str, Any]] = []
+        for record in records:
+            xyz = list(record.scene_xyz)
+            if len(xyz) != 3:
+                raise ValueError("scene_xyz must have length 3")
+
+            ids.append(f"{record.scene_id}::scene")
+            embeddings.append(l2_normalize(record.scene_embedding))
+            metadatas.append({
+                "scene_id": record.scene_id,
+                "scene_x": float(xyz[0]),
+                "scene_y": float(xyz[1]),
+                "scene_z": float(xyz[2]),
+                "scene_image_ref": record.scene_image_ref,
+                "record_type": "scene",
+            })
 
         self._scene_col.upsert(
-            ids=[f"{record.scene_id}::scene"],
-            embeddings=[list(record.scene_embedding)],
-            metadatas=[base_meta],
-            documents=[""],
+            ids=ids,
+            embeddings=embeddings,
+            metadatas=metadatas,
         )
+        for scene_key, meta in zip(ids, metadatas):
+            self._set_scene_xyz(scene_key, _scene_xyz(meta))
+        self.generation += 1
 
     def delete_scene(self, scene_id: str) -> None:
         """Delete a scene"""
         self._scene_col.delete(ids=[f"{scene_id}::scene"])
+        self._drop_scene_xyz(f"{scene_id}::scene")
+        self.generation += 1
 
     def get_scene(self, scene_id: str) -> Optional[Dict[str, Any]]:
         """Get scene by ID"""
@@ -180,105 +493,224 @@ class ObjectVectorDB:
         if not result or not result.get("metadatas"):
             return None
 
-        meta = dict(result["metadatas"][0])
-        meta["scene_xyz"] = [
-            meta.get("scene_x"),
-            meta.get("scene_y"),
-            meta.get("scene_z"),
-        ]
-        return meta
+        return _scene_hit(result["metadatas"][0])
 
     def query_by_scene_embedding(
         self,
-        query_embedding: Sequence[float],
+        query_embedding: Embedding,
         n_results: int = 5,
     ) -> List[Dict[str, Any]]:
         """Query scenes by embedding similarity"""
+        return self.query_by_scene_embeddings([query_embedding], n_results=n_results)[0]
+
+    def query_by_scene_embeddings(
+        self,
+        query_embeddings: Sequence[Embedding],
+        n_results: int = 5,
+    ) -> List[List[Dict[str, Any]]]:
+        """Query scenes for several embeddings in one call"""
+        return self._cache.lookup(
+            ("scene", n_results, self._query_config.ef_search, self.generation),
+            query_embeddings,
+            lambda missing: self._query_scenes(missing, n_results),
+        )
+
+    def _query_scenes(
+        self,
+        query_embeddings: Sequence[Embedding],
+        n_results: int,
+    ) -> List[List[Dict[str, Any]]]:
         result = self._scene_col.query(
-            query_embeddings=[list(query_embedding)],
+            query_embeddings=[l2_normalize(e) for e in query_embeddings],
             n_results=n_results,
             include=["metadatas", "distances"],
         )
 
-        metadatas_batch = result.get("metadatas", [[]])[0]
-        distances_batch = result.get("distances", [[]])[0]
-
-        hits: List[Dict[str, Any]] = []
-        for meta, dist in zip(metadatas_batch, distances_batch):
-            hit = dict(meta)
-            hit["scene_xyz"] = [
-                hit.get("scene_x"),
-                hit.get("scene_y"),
-                hit.get("scene_z"),
+        return [
+            [
+                _scene_hit(m, distance=float(d))
+                for m, d in zip(metadatas_batch, distances_batch)
             ]
-            hit["distance"] = float(dist)
-            hits.append(hit)
+            for metadatas_batch, distances_batch in zip(
+                result.get("metadatas") or [[]] * len(query_embeddings),
+                result.get("distances") or [[]] * len(query_embeddings),
+            )
+        ]
 
-        return hits
+    def _load_scene_index(self) -> None:
+        all_scenes = self._scene_col.get(include=["metadatas"])
+        for scene_key, meta in zip(all_scenes.get("ids") or [], all_scenes.get("metadatas") or []):
+            self._set_scene_xyz(
+                scene_key,
+                (meta.get("scene_x", 0.0), meta.get("scene_y", 0.0), meta.get("scene_z", 0.0)),
+            )
+
+    def _set_scene_xyz(self, scene_key: str, xyz: Sequence[float]) -> None:
+        slot = self._scene_slots.get(scene_key)
+        if slot is None:
+            if self._scene_free:
+                slot = self._scene_free.pop()
+                self._scene_ids[slot] = scene_key
+            else:
+                slot = len(self._scene_ids)
+                if slot == len(self._scene_xyz):
+                    grown = np.full((2 * slot, 3), np.inf)
+                    grown[:slot] = self._scene_xyz
+                    self._scene_xyz = grown
+                self._scene_ids.append(scene_key)
+            self._scene_slots[scene_key] = slot
+        self._scene_xyz[slot] = xyz
+        self._scene_kdtree_dirty = True
+
+    def _drop_scene_xyz(self, scene_key: str) -> None:
+        slot = self._scene_slots.pop(scene_key, None)
+        if slot is None:
+            return
+        self._scene_xyz[slot] = np.inf
+        self._scene_ids[slot] = None
+        self._scene_free.append(slot)
+        self._scene_kdtree_dirty = True
+
+    def _build_scene_kdtree(self, spatial: Any) -> None:
+        n = len(self._scene_ids)
+        self._scene_tree_slots = np.flatnonzero(np.isfinite(self._scene_xyz[:n, 0]))
+        self._scene_kdtree = spatial.cKDTree(self._scene_xyz[self._scene_tree_slots])
+        self._scene_kdtree_dirty = False
 
     def find_scenes_by_slam_coords(
         self,
         query_xyz: Sequence[float],
         radius: float = 1.0,
         n_results: int = 5,
+        query_embedding: Optional[Embedding] = None,
     ) -> List[Dict[str, Any]]:
-        """Find scenes near SLAM coordinates"""
+        """Find scenes near SLAM coordinates.
+
+        With query_embedding, the nearest RERANK_CANDIDATES scenes inside the
+        radius are re-ranked by embedding similarity; hits then carry an
+        embedding_distance and are ordered by it.
+        """
         if len(query_xyz) != 3:
             raise ValueError("query_xyz must have length 3")
-        
-        all_scenes = self._scene_col.get(include=["metadatas"])
-        
-        if not all_scenes or not all_scenes.get("metadatas"):
+
+        n = len(self._scene_ids)
+        if n == len(self._scene_free):
+            return []
+
+        if n_results <= 0 or radius < 0:
+            return []
+
+        n_candidates = n_results if query_embedding is None else max(n_results, self.RERANK_CANDIDATES)
+        query = np.asarray(query_xyz, dtype=np.float64)
+        # optional: without scipy the radius test is a linear scan, compiled with numba if present
+        spatial = optional_module("scipy.spatial")
+        if spatial is not None:
+            if self._scene_kdtree_dirty:
+                self._build_scene_kdtree(spatial)
+            # one ranged kNN call: the n nearest, pruned at radius, already sorted
+            k = min(n_candidates, len(self._scene_tree_slots))
+            dists, nearest = self._scene_kdtree.query(
+                query,
+                k=np.arange(1, k + 1),
+                distance_upper_bound=np.nextafter(radius, np.inf),
+            )
+            found_mask = np.isfinite(dists)
+            slots = self._scene_tree_slots[nearest[found_mask]]
+            dists = dists[found_mask]
+        else:
+            # squared distances, so the radius test needs no sqrt
+            radius_filter = radius_kernel()
+            if radius_filter is not None:
+                capacity = len(self._scene_xyz)
+                if self._radius_idx is None or len(self._radius_idx) < capacity:
+                    self._radius_idx = np.empty(capacity, dtype=np.intp)
+                    self._radius_d2 = np.empty(capacity)
+                found = radius_filter(
+                    self._scene_xyz[:n], query, radius * radius, self._radius_idx, self._radius_d2
+                )
+                idx = self._radius_idx[:found]
+                d2 = self._radius_d2[:found]
+            else:
+                diff = self._scene_xyz[:n] - query
+                d2 = np.einsum("ij,ij->i", diff, diff)
+                idx = np.flatnonzero(d2 <= radius * radius)
+                d2 = d2[idx]
+            k = min(n_candidates, len(idx))
+            top = np.argpartition(d2, k - 1)[:k] if 0 < k < len(idx) else np.arange(len(idx))
+            top = top[np.argsort(d2[top], kind="stable")]
+            slots = idx[top]
+            dists = np.sqrt(d2[top])
+
+        if not len(slots):
+            return []
+
+        selected = [self._scene_ids[i] for i in slots]
+        if query_embedding is None:
+            found = self._scene_col.get(ids=selected, include=["metadatas"])
+            meta_by_id = dict(zip(found.get("ids") or [], found.get("metadatas") or []))
+            return [
+                _scene_hit(m, distance=float(d))
+                for m, d in zip(map(meta_by_id.get, selected), dists)
+                if m is not None
+            ]
+
+        found = self._scene_col.get(ids=selected, include=["metadatas", "embeddings"])
+        found_ids = list(found.get("ids") or [])
+        if not found_ids:
             return []
-        
-        results: List[Dict[str, Any]] = []
-        for meta in all_scenes["metadatas"]:
-            scene_x = meta.get("scene_x", 0.0)
-            scene_y = meta.get("scene_y", 0.0)
-            scene_z = meta.get("scene_z", 0.0)
-            
-            dist = (
-                (scene_x - query_xyz[0]) ** 2 +
-                (scene_y - query_xyz[1]) ** 2 +
-                (scene_z - query_xyz[2]) ** 2
-            ) ** 0.5
-            
-            if dist <= radius:
-                hit = dict(meta)
-                hit["scene_xyz"] = [scene_x, scene_y, scene_z]
-                hit["distance"] = dist
-                results.append(hit)
-        
-        results.sort(key=lambda x: x["distance"])
-        return results[:n_results]
+        meta_by_id = dict(zip(found_ids, found.get("metadatas") or []))
+        dist_by_id = dict(zip(selected, dists.tolist()))
+        return [
+            _scene_hit(
+                meta_by_id[scene_key],
+                distance=dist_by_id[scene_key],
+                embedding_distance=embedding_dist,
+            )
+            for scene_key, embedding_dist in self._rerank_ip(
+                query_embedding, found_ids, found["embeddings"], n_results
+            )
+        ]
+
+    @staticmethod
+    def _rerank_ip(
+        query_embedding: Embedding,
+        ids: List[str],
+        embeddings: Sequence[Embedding],
+        n_results: int,
+    ) -> List[Tuple[str, float]]:
+        """Order ids by cosine distance to query_embedding with one matvec over
+        the re-normalized rows; rows written before upserts normalized, or by
+        other clients, are not guaranteed to be unit length"""
+        candidates = l2_normalize_rows(np.array(embeddings, dtype=np.float32))
+        scores = candidates @ l2_normalize(query_embedding)
+        order = np.argsort(-scores, kind="stable")[:n_results]
+        return [(ids[i], float(1.0 - scores[i])) for i in order]
 
     def get_objects_by_scene(self, scene_id: str) -> List[Dict[str, Any]]:
         """Get all objects in a scene"""
-        all_objects = []
-        
+        self.flush()
         image_results = self._image_col.get(
             where={"scene_id": scene_id},
             include=["metadatas"]
         )
-        if image_results and image_results.get("metadatas"):
-            for meta in image_results["metadatas"]:
-                hit = dict(meta)
-                hit["object_xyz"] = [
-                    hit.get("object_x"),
-                    hit.get("object_y"),
-                    hit.get("object_z"),
-                ]
-                all_objects.append(hit)
-        
-        seen_ids = set()
-        unique_objects = []
-        for obj in all_objects:
-            obj_id = obj.get("object_id")
-            if obj_id and obj_id not in seen_ids:
-                seen_ids.add(obj_id)
-                unique_objects.append(obj)
-        
-        return unique_objects
+
+        # one pass; the dict keeps the first hit per object_id in order
+        unique: Dict[str, Dict[str, Any]] = {}
+        for meta in image_results.get("metadatas") or []:
+            obj_id = meta.get("object_id")
+            if obj_id and obj_id not in unique:
+                unique[obj_id] = _object_hit(meta)
+
+        return list(unique.values())
+
+
+@atexit.register
+def _close_all() -> None:
+    # one exit hook over the shared handles; a directory removed while the
+    # process ran has nothing left to write to
+    for db in list(ObjectVectorDB._INSTANCES.values()):
+        if db._opened and os.path.isdir(db._persist_directory):
+            db.close()
 
 
 __all__ = ["ObjectRecord", "SceneRecord", "ObjectVectorDB"]
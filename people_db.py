@@ -1,155 +1,339 @@
 from __future__ import annotations
 
+import os
+import threading
 from dataclasses import dataclass
-from typing import List, Sequence, Dict, Any, Optional
+from typing import List, Sequence, Dict, Any, Optional, Tuple
 
-import chromadb
+import numpy as np
 
+from db_common import (
+    Embedding,
+    EmbeddingMatrix,
+    QueryCache,
+    QueryConfig,
+    apply_query_config,
+    read_query_config,
+    as_f32,
+    decode_i8,
+    encode_i8,
+    get_client,
+    get_collection,
+    hit_builder,
+    l2_normalize,
+    quantize_i8,
+)
 
-@dataclass
+# metadata keys holding the int8 copy of each stored embedding; the scale
+# is no longer written but is still stripped from rows stored with it
+_Q_KEYS = ("embedding_q", "embedding_q_scale")
+
+
+_people_hit = hit_builder("people")
+
+
+def _strip_q(meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in meta.items() if k not in _Q_KEYS}
+
+
+# eq=False: ndarray fields have no scalar ==, so records compare (and hash) by identity
+@dataclass(slots=True, frozen=True, eq=False)
 class PersonRecord:
     person_id: str
     people_xyz: Sequence[float]
-    face_embedding: Optional[Sequence[float]] = None
-    pose_embedding: Optional[Sequence[float]] = None
+    face_embedding: Optional[np.ndarray] = None
+    pose_embedding: Optional[np.ndarray] = None
     timeframe: Optional[str] = None
     chat_history_ref: Optional[str] = None
+    face_embedding_q: Optional[np.ndarray] = None
+    pose_embedding_q: Optional[np.ndarray] = None
+    
+    def __post_init__(self) -> None:
+        # embeddings are converted to float32 once here; upsert hands them to Chroma as-is
+        if self.face_embedding is not None:
+            object.__setattr__(self, "face_embedding", as_f32(self.face_embedding))
+        if self.pose_embedding is not None:
+            object.__setattr__(self, "pose_embedding", as_f32(self.pose_embedding))
 
 
 class PeopleVectorDB:
     """Database for people storage"""
     
+    _INSTANCES: Dict[str, "PeopleVectorDB"] = {}
+    _INSTANCES_LOCK = threading.Lock()
+    _opened = False
+    
+    def __new__(cls, persist_directory: str = "chroma_people_db") -> "PeopleVectorDB":
+        # one instance per directory: RAM state is per instance, so two
+        # handles on the same files would drift apart after a write
+        key = os.path.abspath(persist_directory)
+        with cls._INSTANCES_LOCK:
+            db = cls._INSTANCES.get(key)
+            if db is None:
+                db = cls._INSTANCES[key] = super().__new__(cls)
+        return db
+    
+    @classmethod
+    def get(cls, persist_directory: str = "chroma_people_db") -> "PeopleVectorDB":
+        """Return the shared handle for persist_directory, opening it on first use"""
+        return cls(persist_directory)
+    
     def __init__(self, persist_directory: str = "chroma_people_db") -> None:
-        self._client = chromadb.PersistentClient(path=persist_directory)
+        with self._INSTANCES_LOCK:
+            if not self._opened:
+                self._open(persist_directory)
+                self._opened = True
+    
+    def _open(self, persist_directory: str) -> None:
+        self._client = get_client(persist_directory)
         
-        self._face_col = self._client.get_or_create_collection(
-            name="people_face",
-            metadata={"hnsw:space": "cosine"},
-        )
+        self._face_col = get_collection(persist_directory, "people_face")
+        self._pose_col = get_collection(persist_directory, "people_pose")
         
-        self._pose_col = self._client.get_or_create_collection(
-            name="people_pose",
-            metadata={"hnsw:space": "cosine"},
-        )
+        # RAM copies of both collections; queries are served from these
+        self._face_rows = EmbeddingMatrix(ann=True)
+        self._pose_rows = EmbeddingMatrix(ann=True)
+        self._load_rows(self._face_col, self._face_rows)
+        self._load_rows(self._pose_col, self._pose_rows)
+        
+        # stored with the collections; keys the query cache and drives the RAM indexes
+        self._query_config = read_query_config(self._face_col)
+        for rows in (self._face_rows, self._pose_rows):
+            rows.set_ef_search(self._query_config.ef_search)
+        self._cache = QueryCache()
+        # bumped on every write so callers can invalidate their own caches
+        self.generation = 0
+    
+    @staticmethod
+    def _load_rows(col: Any, rows: EmbeddingMatrix) -> None:
+        stored = col.get(include=["embeddings", "metadatas"])
+        embeddings = stored.get("embeddings")
+        if embeddings is None:
+            return
+        for meta, embedding in zip(stored.get("metadatas") or [], embeddings):
+            blob = meta.get("embedding_q")
+            codes = decode_i8(blob) if blob else None
+            if codes is None or codes.shape != np.shape(embedding):
+                codes = quantize_i8(embedding)[0]
+            rows.upsert(meta["person_id"], embedding, codes, _strip_q(meta))
+    
+    def configure_search(self, config: QueryConfig) -> None:
+        """Apply query-time HNSW settings to the face and pose collections"""
+        if config == self._query_config:
+            return
+        for col in (self._face_col, self._pose_col):
+            apply_query_config(col, config)
+        for rows in (self._face_rows, self._pose_rows):
+            rows.set_ef_search(config.ef_search)
+        self._query_config = config
     
     def upsert(self, record: PersonRecord) -> None:
         """Store a person"""
-        xyz = list(record.people_xyz)
-        if len(xyz) != 3:
-            raise ValueError("people_xyz must have length 3")
-        
-        base_meta = {
-            "person_id": record.person_id,
-            "people_x": float(xyz[0]),
-            "people_y": float(xyz[1]),
-            "people_z": float(xyz[2]),
-        }
+        self.upsert_many([record])
+    
+    def upsert_many(self, records: Sequence[PersonRecord]) -> None:
+        """Store several people with one write per collection"""
+        face_ids: List[str] = []
+        face_embeddings: List[np.ndarray] = []
+        face_codes: List[np.ndarray] = []
+        face_metas: List[Dict[str, Any]] = []
+        pose_ids: List[str] = []
+        pose_embeddings: List[np.ndarray] = []
+        pose_codes: List[np.ndarray] = []
+        pose_metas: List[Dict[str, Any]] = []
         
-        if record.timeframe:
-            base_meta["timeframe"] = record.timeframe
-        if record.chat_history_ref:
-            base_meta["chat_history_ref"] = record.chat_history_ref
+        for record in records:
+            xyz = list(record.people_xyz)
+            if len(xyz) != 3:
+                raise ValueError("people_xyz must have length 3")
+            
+            base_meta = {
+                "person_id": record.person_id,
+                "people_x": float(xyz[0]),
+                "people_y": float(xyz[1]),
+                "people_z": float(xyz[2]),
+            }
+            
+            if record.timeframe:
+                base_meta["timeframe"] = record.timeframe
+            if record.chat_history_ref:
+                base_meta["chat_history_ref"] = record.chat_history_ref
+            
+            if record.face_embedding is not None and record.face_embedding.size:
+                codes, q_meta = self._quantize(record.face_embedding, record.face_embedding_q)
+                face_ids.append(record.person_id)
+                face_embeddings.append(l2_normalize(record.face_embedding))
+                face_codes.append(codes)
+                face_metas.append({**base_meta, **q_meta, "embedding_type": "face"})
+            
+            if record.pose_embedding is not None and record.pose_embedding.size:
+                codes, q_meta = self._quantize(record.pose_embedding, record.pose_embedding_q)
+                pose_ids.append(record.person_id)
+                pose_embeddings.append(l2_normalize(record.pose_embedding))
+                pose_codes.append(codes)
+                pose_metas.append({**base_meta, **q_meta, "embedding_type": "pose"})
         
-        if record.face_embedding:
+        if face_ids:
             self._face_col.upsert(
-                ids=[f"{record.person_id}::face"],
-                embeddings=[list(record.face_embedding)],
-                metadatas=[{**base_meta, "embedding_type": "face"}],
-                documents=[""],
+                ids=[f"{person_id}::face" for person_id in face_ids],
+                embeddings=face_embeddings,
+                metadatas=face_metas,
             )
+            for person_id, embedding, codes, meta in zip(face_ids, face_embeddings, face_codes, face_metas):
+                self._face_rows.upsert(person_id, embedding, codes, _strip_q(meta))
         
-        if record.pose_embedding:
+        if pose_ids:
             self._pose_col.upsert(
-                ids=[f"{record.person_id}::pose"],
-                embeddings=[list(record.pose_embedding)],
-                metadatas=[{**base_meta, "embedding_type": "pose"}],
-                documents=[""],
+                ids=[f"{person_id}::pose" for person_id in pose_ids],
+                embeddings=pose_embeddings,
+                metadatas=pose_metas,
             )
+            for person_id, embedding, codes, meta in zip(pose_ids, pose_embeddings, pose_codes, pose_metas):
+                self._pose_rows.upsert(person_id, embedding, codes, _strip_q(meta))
+        
+        self.generation += 1
+    
+    @staticmethod
+    def _quantize(
+        embedding: np.ndarray,
+        codes: Optional[np.ndarray],
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        # runs for every record before anything is written, so bad codes
+        # fail the whole batch instead of leaving Chroma and RAM out of step
+        if codes is None:
+            codes = quantize_i8(embedding)[0]
+        else:
+            codes = np.asarray(codes)
+            if codes.dtype != np.int8 or codes.shape != embedding.shape:
+                raise ValueError(
+                    f"int8 codes must be int8 with shape {embedding.shape}, "
+                    f"got {codes.dtype} {codes.shape}"
+                )
+        return codes, {"embedding_q": encode_i8(codes)}
     
     def delete_person(self, person_id: str) -> None:
         """Delete a person"""
         self._face_col.delete(ids=[f"{person_id}::face"])
         self._pose_col.delete(ids=[f"{person_id}::pose"])
+        self._face_rows.remove(person_id)
+        self._pose_rows.remove(person_id)
+        self.generation += 1
     
     def get_person(self, person_id: str) -> Optional[Dict[str, Any]]:
         """Get person by ID"""
-        result = self._face_col.get(
-            ids=[f"{person_id}::face"],
-            include=["metadatas"],
-        )
-        
-        if not result or not result.get("metadatas"):
-            result = self._pose_col.get(
-                ids=[f"{person_id}::pose"],
-                include=["metadatas"],
-            )
-        
-        if not result or not result.get("metadatas"):
+        for rows in (self._face_rows, self._pose_rows):
+            row = rows.index.get(person_id)
+            if row is not None:
+                break
+        else:
             return None
         
-        meta = dict(result["metadatas"][0])
-        meta["people_xyz"] = [
-            meta.get("people_x"),
-            meta.get("people_y"),
-            meta.get("people_z"),
-        ]
-        return meta
+        return _people_hit(rows.metas[row])
     
     def query_by_face_embedding(
         self,
-        query_embedding: Sequence[float],
+        query_embedding: Embedding,
         n_results: int = 5,
+        include_embeddings: bool = False,
+        quantized: bool = True,
     ) -> List[Dict[str, Any]]:
         """Query people by face embedding"""
-        result = self._face_col.query(
-            query_embeddings=[list(query_embedding)],
+        return self.query_by_face_embeddings(
+            [query_embedding],
             n_results=n_results,
-            include=["metadatas", "distances"],
+            include_embeddings=include_embeddings,
+            quantized=quantized,
+        )[0]
+    
+    def query_by_face_embeddings(
+        self,
+        query_embeddings: Sequence[Embedding],
+        n_results: int = 5,
+        include_embeddings: bool = False,
+        quantized: bool = True,
+    ) -> List[List[Dict[str, Any]]]:
+        """Query people for several face embeddings in one call"""
+        return self._query_many(
+            "face", query_embeddings, n_results, include_embeddings, quantized
         )
-        
-        metadatas_batch = result.get("metadatas", [[]])[0]
-        distances_batch = result.get("distances", [[]])[0]
-        
-        hits: List[Dict[str, Any]] = []
-        for meta, dist in zip(metadatas_batch, distances_batch):
-            hit = dict(meta)
-            hit["people_xyz"] = [
-                hit.get("people_x"),
-                hit.get("people_y"),
-                hit.get("people_z"),
-            ]
-            hit["distance"] = float(dist)
-            hits.append(hit)
-        
-        return hits
     
     def query_by_pose_embedding(
         self,
-        query_embedding: Sequence[float],
+        query_embedding: Embedding,
         n_results: int = 5,
+        include_embeddings: bool = False,
+        quantized: bool = True,
     ) -> List[Dict[str, Any]]:
         """Query people by pose embedding"""
-        result = self._pose_col.query(
-            query_embeddings=[list(query_embedding)],
+        return self.query_by_pose_embeddings(
+            [query_embedding],
             n_results=n_results,
-            include=["metadatas", "distances"],
+            include_embeddings=include_embeddings,
+            quantized=quantized,
+        )[0]
+    
+    def query_by_pose_embeddings(
+        self,
+        query_embeddings: Sequence[Embedding],
+        n_results: int = 5,
+        include_embeddings: bool = False,
+        quantized: bool = True,
+    ) -> List[List[Dict[str, Any]]]:
+        """Query people for several pose embeddings in one call"""
+        return self._query_many(
+            "pose", query_embeddings, n_results, include_embeddings, quantized
         )
+    
+    def _query_many(
+        self,
+        embedding_type: str,
+        query_embeddings: Sequence[Embedding],
+        n_results: int,
+        include_embeddings: bool = False,
+        quantized: bool = True,
+    ) -> List[List[Dict[str, Any]]]:
+        rows = self._face_rows if embedding_type == "face" else self._pose_rows
+        return self._cache.lookup(
+            (
+                embedding_type,
+                n_results,
+                include_embeddings,
+                quantized,
+                self._query_config.ef_search,
+                self.generation,
+            ),
+            query_embeddings,
+            lambda missing: self._search_rows(
+                rows, missing, n_results, include_embeddings, quantized
+            ),
+        )
+    
+    @staticmethod
+    def _search_rows(
+        rows: EmbeddingMatrix,
+        query_embeddings: Sequence[Embedding],
+        n_results: int,
+        include_embeddings: bool,
+        quantized: bool,
+    ) -> List[List[Dict[str, Any]]]:
+        """Cosine search over the RAM copy; quantized=True uses the int8
+        USearch index (or scans the int8 codes without usearch),
+        quantized=False scans the float32 rows exactly"""
+        metas = rows.metas
+        all_hits: List[List[Dict[str, Any]]] = []
+        for top, distances in rows.search(query_embeddings, n_results, quantized=quantized):
+            if include_embeddings:
+                all_hits.append([
+                    _people_hit(metas[i], distance=d, embedding=rows.row(i))
+                    for i, d in zip(top.tolist(), distances.tolist())
+                ])
+            else:
+                all_hits.append([
+                    _people_hit(metas[i], distance=d)
+                    for i, d in zip(top.tolist(), distances.tolist())
+                ])
         
-        metadatas_batch = result.get("metadatas", [[]])[0]
-        distances_batch = result.get("distances", [[]])[0]
-        
-        hits: List[Dict[str, Any]] = []
-        for meta, dist in zip(metadatas_batch, distances_batch):
-            hit = dict(meta)
-            hit["people_xyz"] = [
-                hit.get("people_x"),
-                hit.get("people_y"),
-                hit.get("people_z"),
-            ]
-            hit["distance"] = float(dist)
-            hits.append(hit)
-        
-        return hits
+        return all_hits
     
     def get_person_by_face_id(self, face_id: str) -> Optional[Dict[str, Any]]:
         """Get person by FaceID"""
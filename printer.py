@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import io
+import sys
+from typing import Any, Optional, TextIO
+
+
+class Printer:
+    """Buffer a block of output and write it to the stream in one call.
+
+    Only lines written through the Printer itself are buffered; sys.stdout is
+    left alone, so other threads' output is never captured. Code that should
+    join the block takes the Printer as its output callable.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self._stream = stream
+        self._buffer = io.StringIO()
+
+    def __call__(self, *args: Any, **kwargs: Any) -> None:
+        print(*args, file=self._buffer, **kwargs)
+
+    def __enter__(self) -> "Printer":
+        if self._stream is None:
+            self._stream = sys.stdout
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stream.write(self._buffer.getvalue())
+        self._stream.flush()
+
+
+__all__ = ["Printer"]
@@ -1,5 +1,6 @@
 from object_db import ObjectRecord, SceneRecord, ObjectVectorDB
 from people_db import PersonRecord, PeopleVectorDB
+from db_common import QueryConfig
 
 # Re-export everything for backward compatibility
-__all__ = ["ObjectRecord", "SceneRecord", "ObjectVectorDB", "PersonRecord", "PeopleVectorDB"]
+__all__ = ["ObjectRecord", "SceneRecord", "ObjectVectorDB", "PersonRecord", "PeopleVectorDB", "QueryConfig"]